@@ -5,8 +5,10 @@ Captures network requests to identify the actual API endpoints used by the MVR e
 """
 
 import asyncio
-import json
 from pathlib import Path
+
+import orjson
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from playwright.async_api import async_playwright
 
 # Test data - replace with your own values
@@ -19,6 +21,19 @@ TARGET_URL = "https://www.mvr.bg/%D0%B5%D0%BB%D0%B5%D0%BA%D1%82%D1%80%D0%BE%D0%B
 OUTPUT_DIR = Path(__file__).parent / "captured_data"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Abort static resources in the browser so they are never downloaded
+# (set to False to see the fully styled page). Images always load, since the
+# CAPTCHA has to be solved by hand in this browser
+BLOCK_STATIC_RESOURCES = True
+_BLOCKED_RESOURCE_TYPES = {"stylesheet", "font", "media", "manifest"}
+
+# Resource types that are not worth capturing (scripts and images still load, but aren't API calls)
+_SKIPPED_RESOURCE_TYPES = _BLOCKED_RESOURCE_TYPES | {"image", "script"}
+
+# Only text-like response bodies are kept, truncated to this many bytes
+_TEXT_CONTENT_TYPES = ("json", "text", "xml")
+MAX_BODY_BYTES = 2000
+
 async def intercept_traffic():
     """Launch browser and intercept all network traffic"""
 
@@ -31,10 +46,19 @@ async def intercept_traffic():
         context = await browser.new_context()
         page = await context.new_page()
 
+        async def block_static(route):
+            if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+                await route.abort()
+            else:
+                await route.continue_()
+
+        if BLOCK_STATIC_RESOURCES:
+            await page.route("**/*", block_static)
+
         # Set up request interceptor
         async def handle_request(request):
             # Capture API calls (filter out static resources)
-            if any(ext in request.url for ext in ['.js', '.css', '.png', '.jpg', '.woff', '.svg', '.woff2', '.ttf']):
+            if request.resource_type in _SKIPPED_RESOURCE_TYPES:
                 return
 
             req_data = {
@@ -50,20 +74,28 @@ async def intercept_traffic():
 
         # Set up response interceptor
         async def handle_response(response):
-            if any(ext in response.url for ext in ['.js', '.css', '.png', '.jpg', '.woff', '.svg', '.woff2', '.ttf']):
+            if response.request.resource_type in _SKIPPED_RESOURCE_TYPES:
                 return
 
             try:
-                body = await response.text()
+                # Decode only the part of the body we keep, and skip binary payloads entirely
+                body = None
+                body_size = 0
+                content_type = response.headers.get('content-type', '')
+                if any(t in content_type for t in _TEXT_CONTENT_TYPES):
+                    body_bytes = await response.body()
+                    body_size = len(body_bytes)
+                    body = body_bytes[:MAX_BODY_BYTES].decode('utf-8', 'replace')
+
                 resp_data = {
                     'url': response.url,
                     'status': response.status,
                     'headers': dict(response.headers),
-                    'body': body[:2000] if len(body) > 2000 else body
+                    'body': body
                 }
                 captured_responses.append(resp_data)
                 print(f"📥 RESPONSE: {response.status} {response.url}")
-                if body and len(body) < 1000:
+                if body and body_size < 1000:
                     print(f"   Body: {body[:300]}...")
             except Exception as e:
                 print(f"   Could not read body: {e}")
@@ -72,10 +104,10 @@ async def intercept_traffic():
         page.on("response", handle_response)
 
         print(f"\n🌐 Navigating to: {TARGET_URL}")
-        await page.goto(TARGET_URL, wait_until="networkidle")
+        await page.goto(TARGET_URL, wait_until="domcontentloaded")
 
-        print("\n⏳ Waiting for page to fully load (5 seconds)...")
-        await asyncio.sleep(5)
+        print("\n⏳ Waiting for page to fully load...")
+        await page.wait_for_load_state("load")
 
         print("\n🔍 Looking for the e-services portal link...")
 
@@ -91,8 +123,13 @@ async def intercept_traffic():
         except Exception as e:
             print(f"   Error: {e}")
 
-        print("\n⏳ Waiting 20 seconds for you to navigate to the form...")
-        await asyncio.sleep(20)
+        print("\n⏳ Waiting up to 60 seconds for you to navigate to the form...")
+        # Wait for the form itself rather than a URL: it is served from www.mvr.bg
+        # (see ANALYSIS.md), so this usually returns as soon as the page is up
+        try:
+            await page.wait_for_selector("input[name=egn]", timeout=60_000)
+        except PlaywrightTimeoutError:
+            print("   Form not found, continuing on the current page...")
 
         print("\n🔍 Looking for form fields...")
 
@@ -102,32 +139,40 @@ async def intercept_traffic():
             await page.wait_for_selector("input", timeout=5000)
 
             # Get all input fields to understand the form structure
-            inputs = await page.query_selector_all("input")
+            # (one evaluate call instead of a round-trip per attribute)
+            inputs = await page.eval_on_selector_all(
+                "input",
+                """els => els.map(e => ({
+                    name: e.getAttribute('name'),
+                    id: e.getAttribute('id'),
+                    type: e.getAttribute('type'),
+                    placeholder: e.getAttribute('placeholder'),
+                }))""",
+            )
             print(f"\n📋 Found {len(inputs)} input fields:")
             for i, inp in enumerate(inputs):
-                name = await inp.get_attribute("name")
-                placeholder = await inp.get_attribute("placeholder")
-                input_type = await inp.get_attribute("type")
-                input_id = await inp.get_attribute("id")
-                print(f"  {i+1}. Type: {input_type}, Name: {name}, ID: {input_id}, Placeholder: {placeholder}")
+                print(f"  {i+1}. Type: {inp['type']}, Name: {inp['name']}, ID: {inp['id']}, Placeholder: {inp['placeholder']}")
 
             # Look for CAPTCHA
-            captcha_frames = await page.query_selector_all("iframe[src*='recaptcha'], iframe[src*='hcaptcha']")
-            if captcha_frames:
-                print(f"\n🤖 Found {len(captcha_frames)} CAPTCHA iframe(s)")
-                for frame in captcha_frames:
-                    src = await frame.get_attribute("src")
+            captcha_srcs = await page.eval_on_selector_all(
+                "iframe[src*='recaptcha'], iframe[src*='hcaptcha']",
+                "els => els.map(e => e.getAttribute('src'))",
+            )
+            if captcha_srcs:
+                print(f"\n🤖 Found {len(captcha_srcs)} CAPTCHA iframe(s)")
+                for src in captcha_srcs:
                     print(f"   {src}")
             else:
                 print("\n✅ No CAPTCHA iframes found (reCAPTCHA/hCaptcha)")
 
             # Look for buttons
-            buttons = await page.query_selector_all("button")
+            buttons = await page.eval_on_selector_all(
+                "button",
+                "els => els.map(e => ({text: e.innerText, type: e.getAttribute('type')}))",
+            )
             print(f"\n🔘 Found {len(buttons)} buttons:")
             for i, btn in enumerate(buttons):
-                text = await btn.inner_text()
-                btn_type = await btn.get_attribute("type")
-                print(f"  {i+1}. Type: {btn_type}, Text: {text.strip()}")
+                print(f"  {i+1}. Type: {btn['type']}, Text: {btn['text'].strip()}")
 
             print("\n" + "="*80)
             print("⏸️  MANUAL INTERACTION REQUIRED")
@@ -141,10 +186,24 @@ async def intercept_traffic():
             print(f"   3. Submit the form")
             print(f"   4. Wait for results to load")
             print(f"\n   This script will capture all API calls and save them.")
-            print(f"   Waiting for 60 seconds...\n")
+            print(f"   Waiting up to 90 seconds for the form to be submitted...\n")
             print("="*80)
 
-            await asyncio.sleep(60)
+            def is_form_submission(response):
+                # The form is a GET with submitted=1 (see ANALYSIS.md); Cloudflare's
+                # challenge-platform POSTs under /cdn-cgi/ are background noise
+                request = response.request
+                if request.method == "POST":
+                    return "/cdn-cgi/" not in request.url
+                return (request.resource_type == "document" and request.frame == page.main_frame
+                        and "submitted=1" in response.url)
+
+            try:
+                await page.wait_for_response(is_form_submission, timeout=90_000)
+                # Let the result page render before the final screenshot
+                await page.wait_for_load_state("domcontentloaded")
+            except PlaywrightTimeoutError:
+                print("\n   No form submission seen, saving what was captured so far...")
 
         except Exception as e:
             print(f"\n⚠️  Error analyzing form: {e}")
@@ -158,11 +217,11 @@ async def intercept_traffic():
 
     # Save captured traffic
     print("\n💾 Saving captured traffic...")
-    with open(OUTPUT_DIR / "captured_requests.json", "w", encoding="utf-8") as f:
-        json.dump(captured_requests, f, indent=2, ensure_ascii=False)
-
-    with open(OUTPUT_DIR / "captured_responses.json", "w", encoding="utf-8") as f:
-        json.dump(captured_responses, f, indent=2, ensure_ascii=False)
+    # orjson always emits UTF-8, so Cyrillic stays readable
+    (OUTPUT_DIR / "captured_requests.json").write_bytes(
+        orjson.dumps(captured_requests, option=orjson.OPT_INDENT_2))
+    (OUTPUT_DIR / "captured_responses.json").write_bytes(
+        orjson.dumps(captured_responses, option=orjson.OPT_INDENT_2))
 
     print(f"\n✅ Captured {len(captured_requests)} requests and {len(captured_responses)} responses")
     print(f"\n📁 Files saved in: {OUTPUT_DIR}")
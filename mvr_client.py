@@ -4,15 +4,23 @@ MVR Document Query Client
 Programmatic access to Bulgarian Ministry of Internal Affairs document query service
 """
 
+import binascii
+import hashlib
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import BytesIO
-from typing import Dict, Optional
-from urllib.parse import urlencode, quote
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
 
+import lxml.html
 import requests
 from bs4 import BeautifulSoup
+from lxml import etree
 from PIL import Image
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 try:
     import ddddocr
@@ -20,12 +28,48 @@ try:
 except ImportError:
     DDDDOCR_AVAILABLE = False
 
+try:
+    from onnxocr.onnx_paddleocr import ONNXPaddleOcr
+    ONNXOCR_AVAILABLE = True
+except ImportError:
+    ONNXOCR_AVAILABLE = False
+
 try:
     import easyocr
     EASYOCR_AVAILABLE = True
 except ImportError:
     EASYOCR_AVAILABLE = False
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+CAPTCHA_THRESHOLD = 180
+CAPTCHA_MAX_SIZE = (200, 80)
+CAPTCHA_CROP_PADDING = 2
+CAPTCHA_MIN_CROP = 8
+
+if NUMBA_AVAILABLE:
+    # Serial and GIL-free: CAPTCHAs are tiny, and batches are already spread over
+    # threads (parallel=True kernels launched from several threads hang on exit)
+    @njit(nogil=True, cache=True, fastmath=True)
+    def _gray_threshold(arr, thr, out):
+        """Grayscale + binary threshold of an RGB uint8 array in a single pass"""
+        for i in range(arr.shape[0]):
+            for j in range(arr.shape[1]):
+                y = (arr[i, j, 0] * 77 + arr[i, j, 1] * 150 + arr[i, j, 2] * 29) >> 8
+                out[i, j] = 255 if y > thr else 0
+else:
+    def _gray_threshold(arr, thr, out):
+        """Grayscale + binary threshold of an RGB uint8 array (NumPy fallback)"""
+        import numpy as np
+        rgb = arr.astype(np.uint16)
+        y = (rgb[..., 0] * 77 + rgb[..., 1] * 150 + rgb[..., 2] * 29) >> 8
+        np.multiply(y > thr, 255, out=out, casting='unsafe')
+
 
 class MVRClient:
     """Client for querying MVR document status"""
@@ -33,138 +77,370 @@ class MVRClient:
     BASE_URL = "https://www.mvr.bg"
     SERVICE_PATH = "/електронизирани-услуги/справка-за-издадени-и-неполучени-български-лични-документи"
 
-    def __init__(self, use_ocr: bool = True, max_retries: int = 5):
+    # Static part of the query URL; only egn, name and captcha change per attempt
+    _QUERY_PREFIX = f"{BASE_URL}{SERVICE_PATH}?type=6729"
+
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+        'Accept-Language': 'bg,en-US;q=0.7,en;q=0.3',
+        'Accept-Encoding': 'gzip, deflate',  # Exclude br/zstd - requests doesn't support them natively
+        'DNT': '1',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+    }
+
+    # Patterns used on every attempt, compiled once
+    _RE_SUCCESS = re.compile(r'След\s+\d{2}\.\d{2}\.\d{4}.*?получен\.', re.DOTALL)
+    _RE_CAPTCHA_ERR = re.compile(r'Грешка.*?капча|Невалидна.*?капча', re.DOTALL | re.I)
+    _RE_SESSION_EXPIRED = re.compile(r'сесия(?:та)?\s+(?:е\s+)?изтекл|изтекла\s+сесия|session\s+(?:has\s+)?expired', re.I)
+    _RE_NONALNUM = re.compile(r'[^A-Za-z0-9]')
+    _RE_PLAUSIBLE_CAPTCHA = re.compile(r'[A-Za-z0-9]{4,8}')
+
+    # Upper bound on a server-requested Retry-After delay, in seconds
+    MAX_RETRY_AFTER = 60
+
+    # Streaming read sizes: small for the form page so parsing can stop early at the
+    # CAPTCHA, larger for the image; plus the largest CAPTCHA image we'll download
+    FORM_CHUNK_SIZE = 4096
+    CHUNK_SIZE = 65536
+    MAX_CAPTCHA_BYTES = 1024 * 1024
+
+    # CAPTCHA <img> by class, alt text or id: (attribute, case-insensitive substring)
+    _CAPTCHA_IMG_MARKERS = (
+        ('class', 'captcha'),
+        ('alt', 'captcha'),
+        ('alt', 'защитен код'),
+        ('id', 'captcha'),
+    )
+    _CAPTCHA_IMG_SELECTOR = ', '.join(f'img[{attr}*="{text}" i]' for attr, text in _CAPTCHA_IMG_MARKERS)
+
+    # Result containers in order of preference (case-insensitive class match)
+    _CLASS_LOWER = "translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+    _XP_RESULT_CONTAINERS = (
+        etree.XPath(f"//*[contains({_CLASS_LOWER}, 'alert')]"),
+        etree.XPath(f"//div[contains({_CLASS_LOWER}, 'info-bubble')]"),
+        etree.XPath(f"//*[contains({_CLASS_LOWER}, 'result')]"),
+    )
+
+    # Text nodes a browser would render (skips inline JS and CSS)
+    _XP_VISIBLE_TEXT = etree.XPath(".//text()[not(ancestor::script or ancestor::style)]")
+
+    def __init__(self, use_ocr: bool = True, max_retries: int = 5, parallel_attempts: int = 1,
+                 captcha_length: Optional[int] = None):
         """
         Initialize MVR client
 
         Args:
             use_ocr: Whether to use OCR for automatic CAPTCHA solving
             max_retries: Maximum number of CAPTCHA solving retries (default 5)
+            parallel_attempts: Number of CAPTCHAs fetched and solved concurrently
+                per round when using OCR (default 1)
+            captcha_length: Expected CAPTCHA length; OCR results of this length are
+                preferred and submitted first (default None, any 4-8 characters)
         """
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-            'Accept-Language': 'bg,en-US;q=0.7,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate',  # Exclude br/zstd - requests doesn't support them natively
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-        })
+        # Keep connections alive across CAPTCHA retries so each attempt reuses
+        # the pooled TLS connection instead of paying a fresh handshake
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, pool_block=False,
+                                    max_retries=Retry(total=0))
+
+        # CAPTCHAs are bound to the session cookie, so every concurrent attempt
+        # needs its own cookie jar; all sessions share the same connection pool
+        self.parallel_attempts = max(1, parallel_attempts)
+        self._sessions = [self._new_session() for _ in range(self.parallel_attempts)]
+        self.session = self._sessions[0]
+
+        # The form markup is static between attempts; once a session's CAPTCHA is known
+        # to be served from a URL, it only needs to re-download the image. Keyed by
+        # session: (image URL, digest of the last image served on it)
+        self._captcha_state: Dict[requests.Session, Tuple[str, bytes]] = {}
 
         self.use_ocr = use_ocr
         self.max_retries = max_retries
+        self.captcha_length = captcha_length
         self.ocr = None
+        self.onnx_ocr = None
         self.easyocr_reader = None
 
+        # Load the OCR model in the background so it overlaps with fetching the first CAPTCHA
+        self._ocr_ready = threading.Event()
+        self._ocr_error = None
+        if self.use_ocr and not (DDDDOCR_AVAILABLE or ONNXOCR_AVAILABLE or EASYOCR_AVAILABLE):
+            print("Warning: No OCR library available. Install ddddocr, onnxocr or easyocr.")
+            self.use_ocr = False
         if self.use_ocr:
+            threading.Thread(target=self._init_ocr, daemon=True).start()
+        else:
+            self._ocr_ready.set()
+
+    def _init_ocr(self):
+        """Load and warm up the OCR engines (runs on a background thread)"""
+        try:
+            # ddddocr is the primary engine; one fallback engine is loaded alongside
+            # it so the two can race on every CAPTCHA
             if DDDDOCR_AVAILABLE:
                 print("Initializing ddddocr CAPTCHA solver...")
                 self.ocr = ddddocr.DdddOcr(show_ad=False)
+            if ONNXOCR_AVAILABLE:
+                print("Initializing OnnxOCR recognizer...")
+                self.onnx_ocr = ONNXPaddleOcr(use_angle_cls=False, use_gpu=False)
             elif EASYOCR_AVAILABLE:
-                print("Initializing EasyOCR reader (fallback)...")
-                self.easyocr_reader = easyocr.Reader(['en'], gpu=False)
-            else:
-                print("Warning: No OCR library available. Install ddddocr or easyocr.")
-                self.use_ocr = False
-
-    def get_form_page(self) -> BeautifulSoup:
+                print("Initializing EasyOCR reader...")
+                # easyocr's defaults, pinned: int8-quantized CPU model, english_g2 recognizer
+                self.easyocr_reader = easyocr.Reader(['en'], gpu=False, quantize=True,
+                                                     recog_network='english_g2')
+
+            # Run a dummy CAPTCHA through every engine so JIT compilation and
+            # lazy graph setup don't land on the first real one
+            dummy = Image.new('RGB', (64, 24), 'white')
+            for engine in self._ocr_engines():
+                engine(dummy)
+        except Exception as e:
+            # Surfaced by _check_ocr_error() on the caller's thread
+            self._ocr_error = e
+        finally:
+            self._ocr_ready.set()
+
+    def _check_ocr_error(self):
+        """Raise if loading the OCR engine on the background thread failed"""
+        if self._ocr_error is not None:
+            raise RuntimeError(f"Failed to initialize OCR: {self._ocr_error}") from self._ocr_error
+
+    def _wait_for_ocr(self):
+        """Block until the OCR engine has loaded, raising if loading failed"""
+        self._ocr_ready.wait()
+        self._check_ocr_error()
+
+    def _new_session(self) -> requests.Session:
+        """Create a session with browser headers that uses the shared connection pool"""
+        session = requests.Session()
+        session.headers.update(self.HEADERS)
+        session.mount('https://', self._adapter)
+        return session
+
+    def close(self):
+        """Close the underlying HTTP sessions and their pooled connections"""
+        for session in self._sessions:
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_form_page(self, session: Optional[requests.Session] = None) -> BeautifulSoup:
         """
         Fetch the initial form page
 
+        Args:
+            session: Session to fetch with (defaults to the client session)
+
         Returns:
             BeautifulSoup object of the page
         """
+        session = session or self.session
         url = f"{self.BASE_URL}{self.SERVICE_PATH}"
-        response = self.session.get(url, timeout=30)
+        response = session.get(url, timeout=30)
         response.raise_for_status()
         return BeautifulSoup(response.text, 'lxml')
 
-    def extract_captcha_image(self, soup: BeautifulSoup) -> Optional[Image.Image]:
+    def extract_captcha_image(self, soup: BeautifulSoup,
+                              session: Optional[requests.Session] = None) -> Optional[Image.Image]:
         """
         Extract CAPTCHA image from the form page (handles both URL and base64)
 
         Args:
             soup: BeautifulSoup object of the form page
+            session: Session the form page was fetched with (defaults to the client session)
 
         Returns:
             PIL Image object or None
         """
-        # Look for CAPTCHA image by class first (most reliable)
-        captcha_img = soup.find('img', {'class': re.compile(r'captcha', re.I)})
-        if not captcha_img:
-            captcha_img = soup.find('img', {'alt': re.compile(r'captcha|защитен код', re.I)})
-        if not captcha_img:
-            captcha_img = soup.find('img', {'id': re.compile(r'captcha', re.I)})
+        # Look for CAPTCHA image in a single pass over the document
+        captcha_img = soup.select_one(self._CAPTCHA_IMG_SELECTOR)
 
         if captcha_img and captcha_img.get('src'):
-            src = captcha_img['src']
-
-            # Handle base64 inline image
-            if src.startswith('data:image'):
-                import base64
-                # Extract base64 data after the comma
-                base64_data = src.split(',', 1)[1]
-                image_data = base64.b64decode(base64_data)
-                return Image.open(BytesIO(image_data))
-
-            # Handle URL
-            if src.startswith('/'):
-                url = f"{self.BASE_URL}{src}"
-            elif src.startswith('http'):
-                url = src
-            else:
-                url = f"{self.BASE_URL}/{src}"
-
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            return Image.open(BytesIO(response.content))
+            return self._load_captcha(captcha_img['src'], session)
 
         return None
 
-    def download_captcha_image(self, image_url: str) -> Image.Image:
+    def _load_captcha(self, src: str, session: Optional[requests.Session] = None) -> Image.Image:
+        """Load a CAPTCHA image from an <img> src (handles both URL and base64)"""
+        # Handle base64 inline image
+        if src.startswith('data:image'):
+            # Decode the data after the comma through a view, without copying it first
+            data = src.encode('ascii')
+            image_data = binascii.a2b_base64(memoryview(data)[data.index(b',') + 1:])
+            return Image.open(BytesIO(image_data))
+
+        # Handle URL
+        if src.startswith('/'):
+            url = f"{self.BASE_URL}{src}"
+        elif src.startswith('http'):
+            url = src
+        else:
+            url = f"{self.BASE_URL}/{src}"
+
+        session = session or self.session
+        data = self._download_captcha_bytes(url, session)
+        self._captcha_state[session] = (url, hashlib.blake2b(data, digest_size=16).digest())
+        return Image.open(BytesIO(data))
+
+    def _is_captcha_img(self, img) -> bool:
+        """Whether an lxml <img> element matches _CAPTCHA_IMG_MARKERS"""
+        return any(text in (img.get(attr) or '').lower() for attr, text in self._CAPTCHA_IMG_MARKERS)
+
+    def _find_captcha_src(self, session: requests.Session) -> Optional[str]:
+        """
+        Stream the form page and return the CAPTCHA <img> src
+
+        Parsing stops as soon as the image is found; the remainder of the body is
+        still read (but not parsed) so the connection can go back to the pool.
+        """
+        url = f"{self.BASE_URL}{self.SERVICE_PATH}"
+        with session.get(url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+
+            parser = etree.HTMLPullParser(events=('start',), tag='img',
+                                          encoding=self._response_charset(response))
+            chunks = []
+            src = None
+            for chunk in response.iter_content(self.FORM_CHUNK_SIZE):
+                if src:
+                    continue
+                chunks.append(chunk)
+                parser.feed(chunk)
+                for _, img in parser.read_events():
+                    if img.get('src') and self._is_captcha_img(img):
+                        src = img.get('src')
+                        break
+
+        if src:
+            return src
+
+        # Not found while streaming - fall back to a full parse of the page
+        soup = BeautifulSoup(b''.join(chunks), 'lxml')
+        captcha_img = soup.select_one(self._CAPTCHA_IMG_SELECTOR)
+        return captcha_img.get('src') if captcha_img else None
+
+    def download_captcha_image(self, image_url: str,
+                               session: Optional[requests.Session] = None) -> Image.Image:
         """
         Download CAPTCHA image
 
         Args:
             image_url: URL of the CAPTCHA image
+            session: Session to download with (defaults to the client session)
 
         Returns:
             PIL Image object
         """
-        response = self.session.get(image_url, timeout=30)
-        response.raise_for_status()
-        return Image.open(BytesIO(response.content))
+        return Image.open(BytesIO(self._download_captcha_bytes(image_url, session or self.session)))
+
+    def _download_captcha_bytes(self, image_url: str, session: requests.Session) -> bytes:
+        """Download the raw CAPTCHA image, capped at MAX_CAPTCHA_BYTES"""
+        with session.get(image_url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(self.CHUNK_SIZE):
+                size += len(chunk)
+                if size > self.MAX_CAPTCHA_BYTES:
+                    raise RuntimeError(f"CAPTCHA image exceeds {self.MAX_CAPTCHA_BYTES} bytes")
+                chunks.append(chunk)
+
+        return b''.join(chunks)
 
     def _preprocess_captcha(self, image: Image.Image) -> Image.Image:
         """Preprocess CAPTCHA image for better OCR accuracy"""
         import numpy as np
-        try:
-            import cv2
-        except ImportError:
-            return image  # Return original if cv2 not available
 
         # Convert to RGB if needed
-        if image.mode == 'RGBA':
+        if image.mode != 'RGB':
             image = image.convert('RGB')
 
+        # Downscale oversized images - OCR cost grows with pixel count
+        if image.width > CAPTCHA_MAX_SIZE[0] or image.height > CAPTCHA_MAX_SIZE[1]:
+            image = image.copy()
+            image.thumbnail(CAPTCHA_MAX_SIZE, Image.BILINEAR)
+
         # Convert to numpy array
-        img_array = np.array(image)
+        img_array = np.asarray(image)
+
+        # Grayscale + threshold in one pass to get cleaner binary image
+        binary = np.empty(img_array.shape[:2], dtype=np.uint8)
+        _gray_threshold(img_array, CAPTCHA_THRESHOLD, binary)
+
+        # Crop to the bounding box of the dark (text) pixels, unless it's degenerate
+        ink = binary == 0
+        rows = np.flatnonzero(ink.any(axis=1))
+        cols = np.flatnonzero(ink.any(axis=0))
+        if rows.size and cols.size:
+            y0 = max(rows[0] - CAPTCHA_CROP_PADDING, 0)
+            y1 = min(rows[-1] + 1 + CAPTCHA_CROP_PADDING, binary.shape[0])
+            x0 = max(cols[0] - CAPTCHA_CROP_PADDING, 0)
+            x1 = min(cols[-1] + 1 + CAPTCHA_CROP_PADDING, binary.shape[1])
+            if y1 - y0 >= CAPTCHA_MIN_CROP and x1 - x0 >= CAPTCHA_MIN_CROP:
+                binary = binary[y0:y1, x0:x1]
+
+        return Image.fromarray(binary)
 
-        # Convert to grayscale
-        gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+    @staticmethod
+    def _to_bgr(image: Image.Image):
+        """Convert a PIL image to the BGR numpy array onnxocr expects"""
+        import numpy as np
+        return np.ascontiguousarray(np.asarray(image.convert('RGB'))[:, :, ::-1])
 
-        # Apply threshold to get cleaner binary image
-        _, binary = cv2.threshold(gray, 180, 255, cv2.THRESH_BINARY)
+    def _ddddocr_solve(self, image: Image.Image) -> str:
+        """Solve a CAPTCHA with ddddocr"""
+        # Preprocess for better accuracy
+        processed = self._preprocess_captcha(image)
 
-        return Image.fromarray(binary)
+        # ddddocr accepts PIL images directly, avoiding a PNG encode/decode round-trip
+        result = self.ocr.classification(processed)
+        # Clean result - remove any non-alphanumeric chars
+        return self._RE_NONALNUM.sub('', result)
+
+    def _onnxocr_solve(self, image: Image.Image) -> str:
+        """Solve a CAPTCHA with onnxocr (recognition only - the CAPTCHA is a single text line)"""
+        results = self.onnx_ocr.ocr(self._to_bgr(image), det=False, cls=False)
+        return self._RE_NONALNUM.sub('', ''.join(text for text, _ in results[0]))
+
+    def _easyocr_solve(self, image: Image.Image) -> str:
+        """Solve a CAPTCHA with easyocr"""
+        import numpy as np
+        img_array = np.array(image)
+        results = self.easyocr_reader.readtext(img_array, detail=0, decoder='greedy')
+        return self._RE_NONALNUM.sub('', ''.join(results).strip())
+
+    def _ocr_engines(self) -> List[Callable[[Image.Image], str]]:
+        """Loaded OCR engines, in order of preference"""
+        engines = []
+        if self.ocr:
+            engines.append(self._ddddocr_solve)
+        if self.onnx_ocr:
+            engines.append(self._onnxocr_solve)
+        if self.easyocr_reader:
+            engines.append(self._easyocr_solve)
+        return engines
+
+    def _is_plausible_captcha(self, text: str) -> bool:
+        """Quick sanity check of an OCR result before submitting it"""
+        if self.captcha_length:
+            return len(text) == self.captcha_length
+        return bool(self._RE_PLAUSIBLE_CAPTCHA.fullmatch(text))
 
     def solve_captcha_ocr(self, image: Image.Image) -> str:
         """
-        Solve CAPTCHA using OCR (ddddocr preferred, easyocr fallback)
+        Solve CAPTCHA using OCR (ddddocr preferred, onnxocr then easyocr fallback)
+
+        When more than one engine is loaded they run concurrently, and the first
+        plausible-looking result wins.
 
         Args:
             image: PIL Image of the CAPTCHA
@@ -172,29 +448,72 @@ class MVRClient:
         Returns:
             Solved CAPTCHA text
         """
-        # Try ddddocr first (better for CAPTCHAs)
+        self._wait_for_ocr()
+
+        engines = self._ocr_engines()
+        if not engines:
+            raise RuntimeError("No OCR library available. Install ddddocr, onnxocr or easyocr.")
+        if len(engines) == 1:
+            return engines[0](image)
+
+        executor = ThreadPoolExecutor(max_workers=len(engines))
+        futures = [executor.submit(engine, image) for engine in engines]
+        fallback = None
+        try:
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"OCR engine failed: {e}")
+                    continue
+                if self._is_plausible_captcha(result):
+                    return result
+                if fallback is None:
+                    fallback = result
+        finally:
+            # Don't wait for the slower engine once we have an answer
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if fallback is None:
+            raise RuntimeError("All OCR engines failed")
+        return fallback
+
+    def solve_captcha_batch(self, images: List[Image.Image]) -> List[str]:
+        """
+        Solve several CAPTCHAs at once using OCR
+
+        Args:
+            images: PIL Images of the CAPTCHAs
+
+        Returns:
+            Solved CAPTCHA texts, in the same order as the images
+        """
+        if not images:
+            return []
+
+        self._wait_for_ocr()
+
+        # ddddocr runs on onnxruntime, which releases the GIL during inference
         if self.ocr:
-            # Preprocess for better accuracy
-            processed = self._preprocess_captcha(image)
+            with ThreadPoolExecutor(max_workers=len(images)) as executor:
+                return list(executor.map(self.solve_captcha_ocr, images))
 
-            img_bytes = BytesIO()
-            processed.save(img_bytes, format='PNG')
-            result = self.ocr.classification(img_bytes.getvalue())
-            # Clean result - remove any non-alphanumeric chars
-            result = re.sub(r'[^A-Za-z0-9]', '', result)
-            return result
+        # onnxocr's recognizer takes a list of images and batches them itself
+        if self.onnx_ocr:
+            results = self.onnx_ocr.ocr([self._to_bgr(image) for image in images], det=False, cls=False)
+            return [self._RE_NONALNUM.sub('', text) for text, _ in results[0]]
 
-        # Fallback to easyocr
+        # easyocr can push same-sized images through the recognizer as one batch
         if self.easyocr_reader:
             import numpy as np
-            img_array = np.array(image)
-            results = self.easyocr_reader.readtext(img_array, detail=0)
-            if results:
-                captcha_text = ''.join(results).strip()
-                captcha_text = re.sub(r'[^A-Za-z0-9]', '', captcha_text)
-                return captcha_text
+            width, height = images[0].size
+            results = self.easyocr_reader.readtext_batched(
+                [np.array(image) for image in images],
+                n_width=width, n_height=height, batch_size=len(images), detail=0,
+                decoder='greedy')
+            return [self._RE_NONALNUM.sub('', ''.join(texts).strip()) for texts in results]
 
-        raise RuntimeError("No OCR library available. Install ddddocr or easyocr.")
+        raise RuntimeError("No OCR library available. Install ddddocr, onnxocr or easyocr.")
 
     def solve_captcha_manual(self, image: Image.Image) -> str:
         """
@@ -226,60 +545,79 @@ class MVRClient:
         captcha_text = input("Enter CAPTCHA text: ").strip()
         return captcha_text
 
-    def _do_query(self, egn: str, last_name: str, captcha: str) -> Dict:
-        """Internal method to submit a single query attempt"""
-        params = {
-            'type': '6729',
-            'egn': egn,
-            'name': last_name,
-            'captcha': captcha,
-            'submitted': '1'
-        }
+    @staticmethod
+    def _response_charset(response: requests.Response) -> Optional[str]:
+        """Charset declared in the Content-Type header, if any (else let lxml sniff the page)"""
+        if 'charset' in response.headers.get('Content-Type', '').lower():
+            return response.encoding
+        return None
 
-        query_url = f"{self.BASE_URL}{self.SERVICE_PATH}?{urlencode(params, quote_via=quote)}"
-        response = self.session.get(query_url, timeout=30)
+    def _parse_html(self, response: requests.Response):
+        """Parse a response body with lxml; returns None for an empty or unparseable page"""
+        if not response.content.strip():
+            return None
+        parser = lxml.html.HTMLParser(encoding=self._response_charset(response))
+        try:
+            return lxml.html.document_fromstring(response.content, parser=parser)
+        except (etree.ParserError, ValueError):
+            return None
+
+    def _do_query(self, egn: str, last_name: str, captcha: str,
+                  session: Optional[requests.Session] = None) -> Dict:
+        """Internal method to submit a single query attempt"""
+        session = session or self.session
+        query_url = (f"{self._QUERY_PREFIX}&egn={quote(egn, safe='')}"
+                     f"&name={quote(last_name, safe='')}&captcha={quote(captcha, safe='')}&submitted=1")
+        response = session.get(query_url, timeout=30)
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, 'lxml')
+        tree = self._parse_html(response)
 
         # Look for result in various containers
         result_div = None
-        for selector in [
-            lambda: soup.find(class_=lambda x: x and 'alert' in str(x).lower() if x else False),
-            lambda: soup.find('div', class_=re.compile(r'info-bubble', re.I)),
-            lambda: soup.find(class_=lambda x: x and 'result' in str(x).lower() if x else False),
-        ]:
-            result_div = selector()
-            if result_div:
+        for xpath in self._XP_RESULT_CONTAINERS if tree is not None else ():
+            matches = xpath(tree)
+            if matches:
+                result_div = matches[0]
                 break
 
         is_error = False
         is_captcha_error = False
+        is_session_expired = False
         result_text = ""
 
-        if result_div:
-            result_text = result_div.get_text(separator=' ', strip=True)
+        if result_div is not None:
+            result_text = ' '.join(t.strip() for t in self._XP_VISIBLE_TEXT(result_div) if t.strip())
             if 'Грешка' in result_text or 'Невалидна' in result_text:
                 is_error = True
                 if 'капча' in result_text.lower():
                     is_captcha_error = True
+            if self._RE_SESSION_EXPIRED.search(result_text):
+                is_error = True
+                is_session_expired = True
         else:
-            text = soup.get_text()
-            success_match = re.search(r'(След\s+\d{2}\.\d{2}\.\d{4}.*?получен\.)', text, re.DOTALL)
+            text = ''.join(self._XP_VISIBLE_TEXT(tree)) if tree is not None else ''
+            success_match = self._RE_SUCCESS.search(text)
             if success_match:
-                result_text = success_match.group(1)
+                result_text = success_match.group(0)
             else:
-                error_match = re.search(r'(Грешка.*?капча|Невалидна.*?капча)', text, re.DOTALL | re.I)
+                error_match = self._RE_CAPTCHA_ERR.search(text)
+                expired_match = self._RE_SESSION_EXPIRED.search(text)
                 if error_match:
-                    result_text = error_match.group(1)
+                    result_text = error_match.group(0)
                     is_error = True
                     is_captcha_error = True
+                elif expired_match:
+                    result_text = expired_match.group(0)
+                    is_error = True
+                    is_session_expired = True
                 else:
                     result_text = "Could not parse result"
 
         return {
             'success': not is_error,
             'is_captcha_error': is_captcha_error,
+            'is_session_expired': is_session_expired,
             'egn': egn,
             'last_name': last_name,
             'result': result_text,
@@ -303,50 +641,129 @@ class MVRClient:
             print(f"Using pre-solved CAPTCHA: {captcha}")
             return self._do_query(egn, last_name, captcha)
 
-        # Auto-solve with retries
-        for attempt in range(1, self.max_retries + 1):
-            print(f"\n--- Attempt {attempt}/{self.max_retries} ---")
+        # Manual mode solves a single CAPTCHA and doesn't retry
+        if not self.use_ocr:
+            self.session.cookies = requests.cookies.RequestsCookieJar()
 
-            # Reset session for fresh CAPTCHA
-            self.session.cookies.clear()
+            print("Fetching CAPTCHA...")
+            _, captcha_image = self._fetch_captcha(self.session)
 
-            print("Fetching form page...")
-            soup = self.get_form_page()
+            captcha = self.solve_captcha_manual(captcha_image) if captcha_image else ""
+            return self._do_query(egn, last_name, captcha)
 
-            print("Extracting CAPTCHA...")
-            captcha_image = self.extract_captcha_image(soup)
+        # Don't fetch CAPTCHAs from the service if OCR has already failed to load
+        self._check_ocr_error()
+
+        # Auto-solve with retries, fetching several CAPTCHAs concurrently and
+        # solving them as one OCR batch
+        result = None
+        attempt = 0
+        with ThreadPoolExecutor(max_workers=self.parallel_attempts) as executor:
+            throttled = None
+            while attempt < self.max_retries:
+                if attempt:
+                    # Back off between rounds so retries don't trigger throttling
+                    time.sleep(self._retry_delay(attempt, throttled.response if throttled else None))
+
+                batch = min(self.parallel_attempts, self.max_retries - attempt)
+                round_end = attempt + batch
+                print(f"\n--- Attempts {attempt + 1}-{round_end}/{self.max_retries} ---")
+
+                try:
+                    result = self._run_round(executor, egn, last_name, batch, attempt)
+                    throttled = None
+                except requests.HTTPError as e:
+                    if e.response is None or e.response.status_code not in (429, 503):
+                        raise
+                    print(f"Throttled by the server (HTTP {e.response.status_code}), backing off...")
+                    throttled = e
+                    attempt = round_end
+                    continue
+
+                attempt = round_end
+                if result['success'] or not (result['is_captcha_error'] or result['is_session_expired']):
+                    return result
 
-            if not captcha_image:
-                print("No CAPTCHA found, proceeding without it...")
-                captcha = ""
-            elif self.use_ocr:
-                print("Solving CAPTCHA with OCR...")
-                captcha = self.solve_captcha_ocr(captcha_image)
-                print(f"OCR result: '{captcha}'")
-            else:
-                captcha = self.solve_captcha_manual(captcha_image)
-                # Manual mode doesn't retry
-                return self._do_query(egn, last_name, captcha)
+        # All retries exhausted
+        print(f"Failed after {self.max_retries} attempts")
+        if result is None and throttled:
+            raise throttled
+        return result
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Delay before the next retry round: the server's Retry-After if given, else exponential"""
+        retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+        if retry_after.isdigit():
+            return min(float(retry_after), self.MAX_RETRY_AFTER)
+        return min(2 ** attempt * 0.1, 2.0)
+
+    def _run_round(self, executor: ThreadPoolExecutor, egn: str, last_name: str,
+                   batch: int, attempt: int) -> Dict:
+        """Fetch, solve and submit one round of CAPTCHAs; returns the last query result"""
+        fetched = list(executor.map(self._fetch_captcha, self._sessions[:batch]))
+
+        print("Solving CAPTCHAs with OCR...")
+        solved = iter(self.solve_captcha_batch([image for _, image in fetched if image is not None]))
+        candidates = [(session, next(solved) if image is not None else "") for session, image in fetched]
+        print(f"OCR results: {[captcha for _, captcha in candidates]}")
+
+        # Submit plausible-looking results first
+        candidates.sort(key=lambda c: not self._is_plausible_captcha(c[1]))
+
+        result = None
+        for session, captcha in candidates:
+            attempt += 1
 
             # Submit query
-            print("Submitting query...")
-            result = self._do_query(egn, last_name, captcha)
+            print(f"Submitting query with CAPTCHA '{captcha}'...")
+            result = self._do_query(egn, last_name, captcha, session)
 
             if result['success']:
                 print(f"Success on attempt {attempt}!")
                 return result
 
-            if result['is_captcha_error']:
-                print(f"CAPTCHA error, retrying...")
+            if result['is_session_expired']:
+                # Drop the stale session so the next attempt refetches the form
+                session.cookies = requests.cookies.RequestsCookieJar()
+                print("Session expired, retrying...")
                 continue
-            else:
+
+            if not result['is_captcha_error']:
                 # Non-CAPTCHA error, don't retry
                 return result
 
-        # All retries exhausted
-        print(f"Failed after {self.max_retries} attempts")
+            print(f"CAPTCHA error, retrying...")
+
         return result
 
+    def _fetch_captcha(self, session: requests.Session) -> Tuple[requests.Session, Optional[Image.Image]]:
+        """Fetch a fresh CAPTCHA image on the given session"""
+        captcha_image = None
+        state = self._captcha_state.get(session) if session.cookies else None
+        if state:
+            # Session is already established; requesting the image again may yield
+            # a new CAPTCHA without re-downloading the form page
+            url, last_digest = state
+            data = self._download_captcha_bytes(url, session)
+            digest = hashlib.blake2b(data, digest_size=16).digest()
+            if digest != last_digest:
+                self._captcha_state[session] = (url, digest)
+                captcha_image = Image.open(BytesIO(data))
+            # Otherwise the server re-served the same challenge; reload the form
+
+        if captcha_image is None:
+            # Reset session for fresh CAPTCHA (swap the cookie jar only, so the
+            # pooled connection stays warm)
+            session.cookies = requests.cookies.RequestsCookieJar()
+            self._captcha_state.pop(session, None)
+
+            src = self._find_captcha_src(session)
+            captcha_image = self._load_captcha(src, session) if src else None
+
+        if not captcha_image:
+            print("No CAPTCHA found, proceeding without it...")
+        return session, captcha_image
+
 
 def main():
     """Example usage"""
@@ -358,14 +775,17 @@ def main():
     parser.add_argument('--manual', action='store_true', help='Use manual CAPTCHA solving instead of OCR')
     parser.add_argument('--captcha', help='Pre-solved CAPTCHA (skips CAPTCHA fetching)')
     parser.add_argument('--retries', type=int, default=15, help='Max CAPTCHA retry attempts (default: 15)')
+    parser.add_argument('--parallel', type=int, default=1, help='CAPTCHAs solved concurrently per round (default: 1)')
 
     args = parser.parse_args()
 
     # Default to OCR mode with ddddocr (automatic)
-    client = MVRClient(use_ocr=not args.manual, max_retries=args.retries)
+    client = MVRClient(use_ocr=not args.manual, max_retries=args.retries,
+                       parallel_attempts=args.parallel)
 
     try:
-        result = client.query_documents(args.egn, args.last_name, args.captcha)
+        with client:
+            result = client.query_documents(args.egn, args.last_name, args.captcha)
 
         print("\n" + "="*80)
         status = "SUCCESS" if result['success'] else "FAILED"